@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Persistent on-disk cache for embedding vectors, keyed by (model, chunk text).
+
+Embedding is the dominant cost when ingesting a webpage, and reloading the
+same page re-embeds identical chunks. This module stores every computed
+vector in a small SQLite database keyed by a content hash, so unchanged
+chunks skip the embedding API entirely on later loads.
+"""
+
+import hashlib
+import sqlite3
+from typing import List, Optional
+
+import numpy as np
+
+CACHE_PATH = "./emb_cache.sqlite3"
+
+_connection = None
+
+
+def _get_connection() -> sqlite3.Connection:
+    """
+    Return the shared SQLite connection, creating the table on first use.
+
+    Returns:
+        sqlite3.Connection: Connection to the on-disk embedding cache.
+    """
+    global _connection
+    if _connection is None:
+        _connection = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key BLOB PRIMARY KEY, vec BLOB)"
+        )
+        _connection.commit()
+    return _connection
+
+
+def cache_key(model: str, text: str) -> bytes:
+    """
+    Build the cache key for a (model, chunk text) pair.
+
+    Args:
+        model (str): Name of the embedding model.
+        text (str): The chunk text that was (or will be) embedded.
+
+    Returns:
+        bytes: A content-addressed digest identifying this pair.
+    """
+    return hashlib.blake2b(
+        model.encode() + b"|" + text.encode(), digest_size=32
+    ).digest()
+
+
+def get(model: str, text: str) -> Optional[List[float]]:
+    """
+    Look up a cached embedding vector.
+
+    Args:
+        model (str): Name of the embedding model.
+        text (str): The chunk text.
+
+    Returns:
+        Optional[List[float]]: The cached vector, or None on a cache miss.
+    """
+    row = _get_connection().execute(
+        "SELECT vec FROM embeddings WHERE key = ?", (cache_key(model, text),)
+    ).fetchone()
+    if row is None:
+        return None
+    return np.frombuffer(row[0], dtype=np.float32).tolist()
+
+
+def put_many(model: str, texts: List[str], vectors: List[List[float]]) -> None:
+    """
+    Store embedding vectors for a batch of chunk texts.
+
+    Args:
+        model (str): Name of the embedding model.
+        texts (List[str]): The chunk texts that were embedded.
+        vectors (List[List[float]]): One vector per text, in the same order.
+    """
+    connection = _get_connection()
+    connection.executemany(
+        "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+        [
+            (cache_key(model, text), np.asarray(vec, dtype=np.float32).tobytes())
+            for text, vec in zip(texts, vectors)
+        ],
+    )
+    connection.commit()
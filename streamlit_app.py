@@ -4,8 +4,94 @@ Streamlit UI for the RAG application
 """
 
 import os
+import hashlib
+import itertools
 import streamlit as st
-from rag_app import load_webpage, split_documents, create_vectorstore, setup_rag_chain
+from rag_app import (load_webpage, split_documents, create_vectorstore,
+                     setup_rag_chain, delete_collection, CONTEXT_BUDGET)
+
+
+# Static styling, built once at import instead of per rerun
+_CSS = """
+    <style>
+    .stButton>button {
+        color: white;
+        background-color: #0e4c92;
+        border: none;
+        border-radius: 4px;
+        padding: 0.5rem 1rem;
+    }
+    .clear-button>button {
+        background-color: #d32f2f !important;
+    }
+    </style>
+"""
+
+_HEADER = """
+    <div style='background-color: #e3f2fd; padding: 1rem; border-radius: 4px;'>
+        <span style='color: #000000;'>Enter a URL to analyze and ask questions about its content</span>
+    </div>
+"""
+
+# One payload, one element: a single markdown call means a single entry in
+# Streamlit's element diff per render
+_STATIC_HTML = _CSS + _HEADER
+
+
+@st.cache_resource(show_spinner=False)
+def _inject_static():
+    """Render the static CSS and header once; Streamlit replays on rerun."""
+    st.markdown(_STATIC_HTML, unsafe_allow_html=True)
+
+
+# The raw documents and splits are the big per-page payloads, so both
+# caches are capped: memory stays bounded by the last few pages instead
+# of growing with every page ever loaded
+@st.cache_data(ttl=3600, max_entries=8, show_spinner=False)
+def _cached_load(url):
+    """Fetch and parse a webpage, memoized by URL for an hour.
+
+    Raises on failure: load_webpage returns [] on error, and caching that
+    would poison the entry for an hour; an exception is never cached, so
+    the next Load click refetches.
+    """
+    documents = load_webpage(url)
+    if not documents:
+        raise RuntimeError(f"no content loaded from {url}")
+    return documents
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _cached_split(docs_key, _documents):
+    """Split documents into chunks, memoized by a content digest."""
+    return split_documents(_documents)
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_vectorstore(docs_key, model, _splits):
+    """Build the vector store once per (content digest, model) pair."""
+    return create_vectorstore(_splits, model)
+
+
+@st.cache_resource(show_spinner=False)
+def _cached_chain(docs_key, model, context_budget, _vectorstore):
+    """Build the RAG chain once per (content digest, model, budget) tuple."""
+    return setup_rag_chain(_vectorstore, model, context_budget=context_budget)
+
+
+def _docs_key(documents):
+    """Digest of the loaded page contents, used as the downstream cache key."""
+    return hashlib.sha256(
+        "".join(d.page_content for d in documents).encode()
+    ).hexdigest()
+
+
+# Full question -> answer memo, shared across sessions. A plain dict (with
+# a size cap) instead of st.cache_data so cache misses can still stream
+# tokens; the URL's content digest in the key invalidates it naturally.
+_ANSWER_CACHE = {}
+_ANSWER_CACHE_MAX_ENTRIES = 512
+
 
 def main():
     """
@@ -25,7 +111,7 @@ def main():
     - Clear button for resetting application state
     Session State Variables:
         vectorstore: Chroma vectorstore instance for document embeddings
-        rag_chain: RAG chain instance for question answering
+        docs_key: Content digest of the loaded page, keys the memo caches
         current_url: Currently loaded webpage URL
         current_model: Currently selected Ollama model
     Returns:
@@ -38,12 +124,12 @@ def main():
     # Initialize all session state variables first
     if 'vectorstore' not in st.session_state:
         st.session_state.vectorstore = None
-    if 'rag_chain' not in st.session_state:
-        st.session_state.rag_chain = None
     if 'current_url' not in st.session_state:
         st.session_state.current_url = ""
     if 'current_model' not in st.session_state:
         st.session_state.current_model = "llama3"
+    if 'docs_key' not in st.session_state:
+        st.session_state.docs_key = ""
 
     # Set page config and custom CSS
     st.set_page_config(
@@ -67,106 +153,111 @@ def main():
         disabled=disabled
     )
 
+    context_budget = st.sidebar.slider(
+        "Context token budget",
+        min_value=512, max_value=8192, value=CONTEXT_BUDGET, step=256,
+        help="Maximum tokens of retrieved context per question; "
+             "lower is faster, higher recalls more of the page"
+    )
+
     # Check if model has changed
     if model != st.session_state.current_model:
         # Clear the current state and Chroma collection
         if os.path.exists("./chroma_db"):
-            from chromadb.config import Settings
-            import chromadb
-            client = chromadb.PersistentClient(
-                path="./chroma_db",
-                settings=Settings(
-                    anonymized_telemetry=False,
-                    allow_reset=True,
-                    is_persistent=True
-                )
-            )
-            try:
-                client.delete_collection(f"webpage_collection_{st.session_state.current_model}")
-            except:
-                pass  # Collection might not exist
-            
+            delete_collection(st.session_state.current_model)
+
         st.session_state.vectorstore = None
-        st.session_state.rag_chain = None
         st.session_state.current_url = ""
         st.session_state.current_model = model
         st.rerun()
     
-    # Custom CSS for styling
-    st.markdown("""
-        <style>
-        .stButton>button {
-            color: white;
-            background-color: #0e4c92;
-            border: none;
-            border-radius: 4px;
-            padding: 0.5rem 1rem;
-        }
-        .clear-button>button {
-            background-color: #d32f2f !important;
-        }
-        .success-message {
-            color: #2e7d32;
-            padding: 1rem;
-            border-radius: 4px;
-            background-color: #e8f5e9;
-        }
-        .error-message {
-            color: #d32f2f;
-            padding: 1rem;
-            border-radius: 4px;
-            background-color: #ffebee;
-        }
-        </style>
-    """, unsafe_allow_html=True)
-    
     st.title("🔍 Web Page Content Query System")
-    st.markdown("""
-        <div style='background-color: #e3f2fd; padding: 1rem; border-radius: 4px;'>
-            <span style='color: #000000;'>Enter a URL to analyze and ask questions about its content</span>
-        </div>
-    """, unsafe_allow_html=True)
+    _inject_static()
 
+    _url_section(model)
+    _qa_section(model, context_budget)
 
-    # URL input section
+
+@st.fragment
+def _url_section(model):
+    """URL input and webpage loading; reruns alone on its own widgets."""
     url = st.text_input("Enter webpage URL:", key="url_input")
-    
+
     if url and (url != st.session_state.current_url or model != st.session_state.current_model):
         if st.button("Load Webpage"):
             with st.spinner("Loading webpage..."):
-                documents = load_webpage(url)
-                if documents:
-                    splits = split_documents(documents)
-                    st.session_state.vectorstore = create_vectorstore(splits, model)
-                    st.session_state.rag_chain = setup_rag_chain(st.session_state.vectorstore, model)
-                    st.session_state.current_url = url
-                    st.session_state.current_model = model
-                    st.markdown("<div class='success-message'>Webpage loaded successfully! ✅</div>", unsafe_allow_html=True)
-                else:
-                    st.markdown("<div class='error-message'>Failed to load webpage ❌</div>", unsafe_allow_html=True)
-
-    # Question input section
-    if st.session_state.vectorstore is not None:
-        st.write("---")
-        st.write("Ask questions about the webpage content:")
-        question = st.text_input("Your question:", key="question_input")
-        
-        if question:
-            if st.button("Get Answer"):
                 try:
-                    with st.spinner("Generating answer..."):
-                        answer = st.session_state.rag_chain.invoke(question)
-                        st.write("### Answer:")
+                    documents = _cached_load(url)
+                except Exception:
+                    st.error("Failed to load webpage ❌")
+                    return
+                docs_key = _docs_key(documents)
+                st.session_state.docs_key = docs_key
+                splits = _cached_split(docs_key, documents)
+                st.session_state.vectorstore = _cached_vectorstore(docs_key, model, splits)
+                st.session_state.current_url = url
+                st.session_state.current_model = model
+                st.toast("Webpage loaded successfully!", icon="✅")
+                # Full rerun so the question section appears
+                st.rerun(scope="app")
+
+
+@st.fragment
+def _qa_section(model, context_budget):
+    """Question input and answer rendering; reruns alone on its own widgets."""
+    if st.session_state.vectorstore is None:
+        return
+
+    st.write("---")
+    st.write("Ask questions about the webpage content:")
+    question = st.text_input("Your question:", key="question_input",
+                             help="Separate multiple questions with ';;' to run them in parallel")
+
+    if question:
+        if st.button("Get Answer"):
+            try:
+                # Resolve the chain from the memo on every run rather than
+                # from a handle captured at load time, so moving the budget
+                # slider applies to the already-loaded page; the build is
+                # cached per (page, model, budget) and costs nothing
+                rag_chain = _cached_chain(st.session_state.docs_key, model,
+                                          context_budget,
+                                          st.session_state.vectorstore)
+                questions = [q.strip() for q in question.split(";;") if q.strip()]
+                if len(questions) > 1:
+                    # One batched call; the runnable threads the requests so
+                    # retrieval and generation round-trips overlap
+                    with st.spinner("Generating answers..."):
+                        answers = rag_chain.batch(
+                            questions, config={"max_concurrency": 4}
+                        )
+                    for q, answer in zip(questions, answers):
+                        st.write(f"### {q}")
                         st.write(answer)
-                except Exception as e:
-                    st.error(f"Error generating answer: {e}")
-
-        if st.button("Clear Current Webpage", key="clear-button", help="Reset the application state"):
-            st.markdown("<style>.clear-button>button { background-color: #d32f2f !important; }</style>", unsafe_allow_html=True)
-            st.session_state.vectorstore = None
-            st.session_state.rag_chain = None
-            st.session_state.current_url = ""
-            st.rerun()
+                        _ANSWER_CACHE[(st.session_state.docs_key, q, model,
+                                       context_budget)] = answer
+                    return
+                st.write("### Answer:")
+                cache_key = (st.session_state.docs_key, question, model, context_budget)
+                if cache_key in _ANSWER_CACHE:
+                    st.write(_ANSWER_CACHE[cache_key])
+                else:
+                    tokens = rag_chain.stream(question)
+                    # Spinner covers only retrieval + prefill; rendering
+                    # takes over as soon as the first token arrives
+                    with st.spinner("Generating answer..."):
+                        first = next(tokens, "")
+                    answer = st.write_stream(itertools.chain([first], tokens))
+                    if len(_ANSWER_CACHE) >= _ANSWER_CACHE_MAX_ENTRIES:
+                        _ANSWER_CACHE.pop(next(iter(_ANSWER_CACHE)))
+                    _ANSWER_CACHE[cache_key] = answer
+            except Exception as e:
+                st.error(f"Error generating answer: {e}")
+
+    if st.button("Clear Current Webpage", key="clear-button", help="Reset the application state"):
+        st.session_state.vectorstore = None
+        st.session_state.current_url = ""
+        st.rerun(scope="app")
 
 if __name__ == "__main__":
     main()